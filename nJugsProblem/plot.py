@@ -1,14 +1,16 @@
+import argparse
 import json
 import matplotlib.pyplot as plt
 
 from the3jugs import NJugsProblem
 from solvers import BFSSearch, DFSSearch
+from result_cache import DEFAULT_CACHE_PATH, ResultCache, cached_solve
 
 def load_cases(path="test_cases.json"):
     with open(path, "r") as f:
         return json.load(f)
 
-def main():
+def main(cache=None):
     cases = load_cases("test_cases.json")
 
     bfs_rows = []
@@ -21,8 +23,8 @@ def main():
 
         problem = NJugsProblem(caps, goal)
 
-        bfs = BFSSearch(problem).solve()
-        dfs = DFSSearch(problem).solve()
+        bfs = cached_solve(cache, problem, BFSSearch)
+        dfs = cached_solve(cache, problem, DFSSearch)
 
         bfs_rows.append((s, bfs["b"], bfs["d"], bfs["time"]))
         dfs_rows.append((s, dfs["b"], dfs["D"], dfs["time"]))
@@ -82,4 +84,16 @@ def main():
     plt.show()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Plot BFS/DFS scaling on the test cases.")
+    # Off by default: cached results keep the timings of the run that stored them.
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE_PATH,
+                        help="reuse results from this cache file (timings are not re-measured)")
+    parser.add_argument("--clear-cache", action="store_true", help="empty the result cache first")
+    args = parser.parse_args()
+
+    cache = None
+    if args.cache is not None:
+        cache = ResultCache(args.cache)
+        if args.clear_cache:
+            cache.clear()
+    main(cache)
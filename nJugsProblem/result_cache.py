@@ -0,0 +1,160 @@
+# ============================================================
+# Persistent (on-disk) cache of solver results
+# ============================================================
+
+import hashlib
+import inspect
+import json
+import sqlite3
+import sys
+import threading
+import time
+
+import the3jugs
+
+DEFAULT_CACHE_PATH = ".jugs_cache.sqlite"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key         TEXT PRIMARY KEY,
+    solver      TEXT NOT NULL,
+    result      TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    last_access REAL NOT NULL
+)
+"""
+
+
+"""
+Version of a solver class: a hash of the source code of its module and of
+the problem definition (the3jugs.py). Any change to the solver code (or to
+the successor function it relies on) gives a new version, so stale results
+are never returned.
+"""
+def solver_version(solver_cls):
+    h = hashlib.sha256()
+    h.update(inspect.getsource(sys.modules[solver_cls.__module__]).encode("utf-8"))
+    h.update(inspect.getsource(the3jugs).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _option_value(value):
+    # Functions (e.g. heuristics) are identified by name, other values by repr.
+    if callable(value) and hasattr(value, "__qualname__"):
+        return f"{getattr(value, '__module__', '')}.{value.__qualname__}"
+    return repr(value)
+
+
+def cache_key(capacities, goal, solver_name, version, cost_model=None, options=None):
+    key = [[int(c) for c in capacities], [int(g) for g in goal], solver_name, version]
+    if cost_model is not None and not cost_model.is_unit:
+        key.append(list(cost_model.as_tuple()))
+    if options:
+        key.append(sorted([name, _option_value(value)] for name, value in options.items()))
+    payload = json.dumps(key, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+"""
+Content-addressed cache of solve results, stored in a local SQLite file.
+
+Results are keyed on a hash of (capacities, goal, solver name, solver version),
+plus the cost model when it is not the unit cost and the solver options
+(keyword arguments such as beam_width) when there are any.
+When the stored results grow over ``max_bytes``, the least recently used ones
+are evicted. Only complete results are stored (see SearchBudget).
+
+    cache = ResultCache()
+    res = cached_solve(cache, problem, BFSSearch)
+"""
+class ResultCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+
+    def _key(self, capacities, goal, solver_cls, cost_model, options):
+        if solver_cls not in self._versions:
+            self._versions[solver_cls] = solver_version(solver_cls)
+        return cache_key(capacities, goal, solver_cls.__name__, self._versions[solver_cls], cost_model, options)
+
+    def get(self, capacities, goal, solver_cls, cost_model=None, options=None):
+        key = self._key(capacities, goal, solver_cls, cost_model, options)
+        with self._lock:
+            row = self._db.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+
+        res = json.loads(row[0])
+        res["best_path"] = [tuple(s) for s in res["best_path"]]
+        return res
+
+    def put(self, capacities, goal, solver_cls, result, cost_model=None, options=None):
+        if not result.get("complete", True):
+            return
+        key = self._key(capacities, goal, solver_cls, cost_model, options)
+        blob = json.dumps(result, separators=(",", ":"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, solver, result, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, solver_cls.__name__, blob, len(blob), time.time()),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT key, size FROM results ORDER BY last_access").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM results")
+            self._db.commit()
+            self._db.execute("VACUUM")
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+
+"""
+Returns ``solver_cls(problem, **kwargs).solve()``, looking it up in ``cache``
+first (and storing it there afterwards). With cache=None it just solves.
+
+All keyword arguments but ``budget`` are part of the cache key (the budget
+only decides whether the result is complete, and incomplete results are
+not cached). A cached result keeps the "time" of the run that stored it,
+so when a cache is given, results carry cached=True (looked up) or
+cached=False (just solved).
+"""
+def cached_solve(cache, problem, solver_cls, **kwargs):
+    if cache is None:
+        return solver_cls(problem, **kwargs).solve()
+
+    cost_model = getattr(problem, "cost_model", None)
+    options = {name: value for name, value in kwargs.items() if name != "budget"}
+    res = cache.get(problem.capacities, problem.goal, solver_cls, cost_model, options)
+    if res is not None:
+        res["cached"] = True
+        return res
+    res = solver_cls(problem, **kwargs).solve()
+    cache.put(problem.capacities, problem.goal, solver_cls, res, cost_model, options)
+    res["cached"] = False
+    return res
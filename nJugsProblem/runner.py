@@ -5,13 +5,54 @@
 
 import math
 import json
+import multiprocessing
+import queue
+import time
 
 from solvers import *
 from the3jugs import * 
+from result_cache import DEFAULT_CACHE_PATH, ResultCache, cached_solve
+
+# Solver name (as used in the results dictionaries) -> solver class.
+SOLVERS = {
+    "backtracking": BacktrackingSearch,
+    "backtrackingIter": BacktrackingSearchIterative,
+    "bfs": BFSSearch,
+    "dfs": DFSSearch,
+    "bfsExternal": ExternalBFSSearch,
+    "ucs": UniformCostSearch,
+}
+
+# Solvers run by default (by run_case, main, ...).
+DEFAULT_SOLVERS = ["backtracking", "backtrackingIter", "bfs", "dfs"]
+
+# Solvers whose solution, when found, is proven to be of minimum cost
+# (BFS only for the unit cost, which is what the test cases use).
+OPTIMAL_SOLVERS = {"bfs", "bfsExternal", "ucs"}
+
+"""
+Runs a single solver (by name, see ``SOLVERS``) on ``problem``
+and returns its result dictionary.
+
+``budget`` (a SearchBudget) limits the time, expanded states or memory
+of the solver; it then returns its best result so far with complete=False.
+``cache`` (a ResultCache) is consulted first; complete results are stored in it.
+With a cache, the result has cached=True when it was looked up (its "time"
+is then that of the run that stored it) and cached=False otherwise.
+
+The recursive backtracking solver may exceed Python's recursion limit
+on large cases; in that case an empty "not found" result is returned.
+"""
+def run_solver(problem, solver_name, budget=None, cache=None):
+    try:
+        return cached_solve(cache, problem, SOLVERS[solver_name], budget=budget)
+    except RecursionError as e:
+        print(f"Caught a RecursionError: {e}")
+        return dict(best_cost=math.nan, best_path=[], found=False, expanded=0, complete=False)
 
 """
-Runs all four algorithms on a test case 
-and returns the results as a dictionary.
+Runs all four algorithms (or only the ones named in ``solvers``,
+see ``SOLVERS``) on a test case and returns the results as a dictionary.
 
     ** Modify ** it to track the:
         execution time
@@ -19,42 +60,123 @@ and returns the results as a dictionary.
     dictionaries (bt_res, bti_res, bfs_res and dfs_res)
 
 """
-def run_case(case):
+def run_case(case, budget=None, cache=None, solvers=DEFAULT_SOLVERS):
     capacities = case["capacities"]
     goal = case["goal"]
 
     problem = NJugsProblem(capacities=capacities, goal=goal)
 
-    # Backtracking
-    try:
-        bt = BacktrackingSearch(problem)
-        bt_res = bt.solve()
-    except RecursionError as e:
-        print(f"Caught a RecursionError: {e}")
-        bt_res = dict(best_cost=math.nan, best_path=[], found=False, expanded=0)
-
-    # Iterative Backtracking
-    bti = BacktrackingSearchIterative(problem)
-    bti_res = bti.solve()
-
-    # BFS
-    bfs = BFSSearch(problem)
-    bfs_res = bfs.solve()
-
-    # DFS
-    dfs = DFSSearch(problem)
-    dfs_res = dfs.solve()
-
-    return {
+    res = {
         "name": case.get("name", ""),
         "capacities": capacities,
         "start": [0, 0, 0],
         "goal": goal,
-        "backtracking": bt_res,
-        "backtrackingIter": bti_res,
-        "bfs": bfs_res,
-        "dfs": dfs_res,
     }
+    for alg in solvers:
+        res[alg] = run_solver(problem, alg, budget, cache)
+    return res
+
+"""
+True if ``res`` (from solver ``solver_name``) settles the case: either an
+optimal solver found a solution, or a search ran to completion without
+finding any (the goal is unreachable).
+"""
+def is_proven(solver_name, res):
+    if not res.get("complete", True):
+        return False
+    if res["found"]:
+        return solver_name in OPTIMAL_SOLVERS
+    return not math.isnan(res["best_cost"])
+
+def _portfolio_worker(case, solver_name, limits, results):
+    # The budget is rebuilt here from its plain limits: its cancellation token
+    # cannot be sent to another process (the race is stopped by terminating it).
+    budget = None if limits is None else SearchBudget(*limits)
+    problem = NJugsProblem(capacities=case["capacities"], goal=case["goal"])
+    results.put((solver_name, run_solver(problem, solver_name, budget)))
+
+"""
+Races several solvers on the same case, each one in its own process, and
+returns as soon as one of them gives a proven answer (see ``is_proven``);
+the other processes are then terminated.
+
+If no solver proves anything (or ``timeout`` seconds elapse), the best
+solution found so far is returned, with proven=False.
+
+returns a dictionary:
+    name, capacities, goal,
+    winner= name of the solver whose result is returned (None if none finished),
+    result= its result dictionary,
+    proven= boolean
+"""
+def run_portfolio(case, solvers=DEFAULT_SOLVERS, budget=None, cache=None, timeout=None):
+    out = dict(name=case.get("name", ""), capacities=case["capacities"], goal=case["goal"],
+               winner=None, result=None, proven=False)
+
+    problem = NJugsProblem(capacities=case["capacities"], goal=case["goal"])
+    if cache is not None:
+        for alg in solvers:
+            res = cache.get(problem.capacities, problem.goal, SOLVERS[alg], problem.cost_model)
+            if res is not None and is_proven(alg, res):
+                res["cached"] = True
+                out.update(winner=alg, result=res, proven=True)
+                return out
+
+    limits = None if budget is None else (budget.max_time, budget.max_expanded, budget.max_memory)
+    results = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=_portfolio_worker, args=(case, alg, limits, results), daemon=True)
+        for alg in solvers
+    ]
+    for p in procs:
+        p.start()
+
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    pending = len(procs)
+    try:
+        while pending:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            try:
+                alg, res = results.get(timeout=0.05)
+            except queue.Empty:
+                if not any(p.is_alive() for p in procs) and results.empty():
+                    break  # a worker died without reporting
+                continue
+            pending -= 1
+
+            if is_proven(alg, res):
+                out.update(winner=alg, result=res, proven=True)
+                if cache is not None:
+                    cache.put(problem.capacities, problem.goal, SOLVERS[alg], res, problem.cost_model)
+                break
+            best = out["result"]
+            if best is None or (res["found"] and not (best["found"] and best["best_cost"] <= res["best_cost"])):
+                out.update(winner=alg, result=res)
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        for p in procs:
+            p.join()
+
+    return out
+
+def pretty_print_portfolio(res):
+    print("=" * 70)
+    print(f"Case: {res['name']}")
+    print(f" Capacities: {res['capacities']}")
+    print(f" Goal:       {tuple(res['goal'])}")
+    if res["winner"] is None:
+        print("  [PORTFOLIO] no solver finished")
+        return
+    r = res["result"]
+    status = "FOUND" if r["found"] else "NO SOLUTION"
+    if not res["proven"]:
+        status += " (NOT PROVEN)"
+    if r.get("cached"):
+        status += " (CACHED)"
+    print(f"  [PORTFOLIO] winner={res['winner']} | {status} | cost={r['best_cost']} | expanded={r['expanded']}")
 
 """
 Reads the results stored in ``res`` and prints them.
@@ -74,10 +196,16 @@ def pretty_print_result(res, show_paths=False):
     print(f" Start:      {tuple(res['start'])}")
     print(f" Goal:       {tuple(res['goal'])}")
 
-    for alg in ["backtracking", "backtrackingIter", "bfs", "dfs"]:
+    for alg in SOLVERS:
     # for alg in ["bfs"]:
+        if alg not in res:
+            continue
         r = res[alg]
         status = "FOUND" if r["found"] else "NO SOLUTION"
+        if not r.get("complete", True):
+            status += " (INCOMPLETE)"
+        if r.get("cached"):
+            status += " (CACHED)"
         print(f"  [{alg.upper()}] {status} | cost={r['best_cost']} | expanded={r['expanded']}")
         if show_paths and r["found"]:
             print(f"   Path length: {len(r['best_path'])-1}")
@@ -134,5 +262,163 @@ def main():
         json.dump(results, f, indent=2)
     print("\nWrote detailed results to results.json")
 
+"""
+Reads the (case name, solver name) pairs already recorded in a JSON Lines
+results file, so that an interrupted run can be resumed.
+
+A missing file means nothing has been recorded yet. A truncated last line
+(e.g. left behind by a crash) is cut off the file; that solver is simply re-run.
+"""
+def read_done_jsonl(path):
+    done = set()
+    try:
+        with open(path, "r+b") as f:
+            good_end = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                done.add((rec["name"], rec["solver"]))
+                good_end += len(line)
+            f.truncate(good_end)
+    except FileNotFoundError:
+        pass
+    return done
+
+"""
+Runs every solver on every case and appends one compact JSON record per
+(case, solver) to ``path`` as soon as that solver finishes, so that memory
+use does not grow with the suite and a crash only loses the solver in progress.
+
+Each record looks like:
+    {"name": ..., "capacities": [...], "goal": [...], "solver": "bfs",
+     "result": {"best_cost": ..., "found": ..., "expanded": ..., ...}}
+
+    include_paths= if False, "best_path" is replaced by "path_len" (number of steps);
+                   if True, the path is kept as a list of states
+    resume= if True, cases/solvers already present in ``path`` are skipped
+            and new records are appended; otherwise ``path`` is overwritten
+    budget= optional SearchBudget applied to every solver run
+    cache=  optional ResultCache consulted before solving
+    solvers= names of the solvers to run (see ``SOLVERS``)
+"""
+def run_cases_jsonl(cases, path, include_paths=False, resume=False, verbose=True, budget=None, cache=None,
+                    solvers=DEFAULT_SOLVERS):
+    done = read_done_jsonl(path) if resume else set()
+    mode = "a" if resume else "w"
+
+    with open(path, mode, encoding="utf-8") as f:
+        for case in cases:
+            name = case.get("name", "")
+            todo = [alg for alg in solvers if (name, alg) not in done]
+            if not todo:
+                continue
+
+            problem = NJugsProblem(capacities=case["capacities"], goal=case["goal"])
+            for alg in todo:
+                res = run_solver(problem, alg, budget, cache)
+                path_states = res.pop("best_path")
+                if include_paths:
+                    res["best_path"] = [list(s) for s in path_states]
+                else:
+                    res["path_len"] = max(len(path_states) - 1, 0)
+
+                rec = dict(name=name, capacities=case["capacities"], goal=case["goal"],
+                           solver=alg, result=res)
+                f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+                f.flush()
+
+                if verbose:
+                    status = "FOUND" if res["found"] else "NO SOLUTION"
+                    if not res.get("complete", True):
+                        status += " (INCOMPLETE)"
+                    if res.get("cached"):
+                        status += " (CACHED)"
+                    print(f"{name} [{alg.upper()}] {status} | cost={res['best_cost']} | expanded={res['expanded']}")
+
+"""
+Command line entry point.
+
+With no arguments this runs the same cases and solvers as ``main()`` and
+writes results.json, but it reuses the result cache: results looked up there
+are marked cached=True (and "(CACHED)" when printed), since their times come
+from an earlier run; pass --no-cache to recompute everything.
+    --cases PATH   test cases file (default: test_cases.json)
+    --jsonl PATH   stream one record per (case, solver) to PATH instead of results.json
+    --paths        keep full solution paths in the JSON Lines records
+    --resume       skip cases/solvers already recorded in PATH
+    --max-time S, --max-expanded N, --max-memory MB
+                   budget for each solver run
+    --cache PATH   result cache file (default: .jugs_cache.sqlite)
+    --no-cache     bypass the result cache
+    --clear-cache  empty the result cache before running
+    --solvers A,B  comma-separated solver names to run (default: the four classic ones)
+    --portfolio    race the selected solvers on each case and keep the first proven answer
+    --timeout S    give up on a portfolio race after S seconds
+"""
+def cli(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the jug solvers on the test cases.")
+    parser.add_argument("--cases", default="test_cases.json", help="test cases file")
+    parser.add_argument("--jsonl", metavar="PATH", help="stream results as JSON Lines to PATH")
+    parser.add_argument("--paths", action="store_true", help="include solution paths in JSON Lines records")
+    parser.add_argument("--resume", action="store_true", help="resume a partial JSON Lines run")
+    parser.add_argument("--max-time", type=float, help="time budget per solver run (seconds)")
+    parser.add_argument("--max-expanded", type=int, help="expanded states budget per solver run")
+    parser.add_argument("--max-memory", type=float, help="process memory budget (MB)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="result cache file")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the result cache")
+    parser.add_argument("--clear-cache", action="store_true", help="empty the result cache first")
+    parser.add_argument("--solvers", default=",".join(DEFAULT_SOLVERS),
+                        help="comma-separated solvers to run, among: " + ", ".join(SOLVERS))
+    parser.add_argument("--portfolio", action="store_true", help="race the solvers, keep the first proven answer")
+    parser.add_argument("--timeout", type=float, help="portfolio race timeout (seconds)")
+    args = parser.parse_args(argv)
+
+    solvers = [s.strip() for s in args.solvers.split(",") if s.strip()]
+    unknown = [s for s in solvers if s not in SOLVERS]
+    if unknown or not solvers:
+        parser.error(f"unknown solver(s): {', '.join(unknown)}; choose among: {', '.join(SOLVERS)}")
+
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(args.cache)
+        if args.clear_cache:
+            cache.clear()
+
+    budget = None
+    if args.max_time is not None or args.max_expanded is not None or args.max_memory is not None:
+        budget = SearchBudget(
+            max_time=args.max_time,
+            max_expanded=args.max_expanded,
+            max_memory=None if args.max_memory is None else int(args.max_memory * 1024 * 1024),
+        )
+
+    if args.portfolio:
+        for case in read_cases_from_json(args.cases):
+            pretty_print_portfolio(run_portfolio(case, solvers, budget, cache, args.timeout))
+        return
+
+    if args.jsonl is None:
+        # Same output as main(), with the options above.
+        results = []
+        for case in read_cases_from_json(args.cases):
+            res = run_case(case, budget, cache, solvers)
+            results.append(res)
+            pretty_print_result(res)
+        with open("results.json", "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print("\nWrote detailed results to results.json")
+        return
+
+    cases = read_cases_from_json(args.cases)
+    run_cases_jsonl(cases, args.jsonl, include_paths=args.paths, resume=args.resume,
+                    budget=budget, cache=cache, solvers=solvers)
+    print(f"\nWrote results to {args.jsonl}")
+
 if __name__ == "__main__":
-    main()
+    cli()
@@ -4,12 +4,122 @@
 # Authors: S. El Alaoui and ChatGPT 5
 # ============================================================
 
+import asyncio
+import bisect
 import math
 from collections import deque
+import heapq
+import itertools
+import multiprocessing
+import os
+import random
+import struct
+import sys
+import tempfile
+import threading
 import time
+import traceback
+import zlib
 
 from the3jugs import *
 
+
+# ------------------------------------------------------------
+# Budgets and cancellation
+# ------------------------------------------------------------
+
+"""
+Lets another thread (or an asyncio task, see solve_async) ask a running
+solver to stop. The solver notices it at its next budget check.
+"""
+class CancellationToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+def _current_memory():
+    # Resident set size of the whole process, in bytes.
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    # No /proc (e.g. macOS): fall back to the *peak* RSS, which never decreases.
+    # ru_maxrss is in bytes on macOS, in kilobytes on Linux/BSD.
+    # resource is Unix-only, hence imported here; elsewhere max_memory is not enforced.
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+"""
+Limits for one solve. Every limit is optional (None = unlimited):
+    max_time=     seconds since the solve started
+    max_expanded= number of states expanded (as counted by the solver)
+    max_memory=   resident memory of the whole process, in bytes (without /proc,
+                  e.g. on macOS, the peak resident memory so far; not enforced
+                  where neither /proc nor the resource module is available)
+    token=        CancellationToken; cancelling it stops the solver
+    check_every=  time, memory and cancellation are only checked once every
+                  ``check_every`` calls, since they are not free
+
+A solver that runs out of budget returns its best result so far with
+complete=False (complete=True otherwise); ``reason`` tells which limit was hit.
+The budget is restarted by every solve, so it can be reused for
+successive solves, but not shared by solves running at the same time.
+"""
+class SearchBudget:
+    def __init__(self, max_time=None, max_expanded=None, max_memory=None,
+                 token=None, check_every=256):
+        self.max_time = max_time
+        self.max_expanded = max_expanded
+        self.max_memory = max_memory
+        self.token = token if token is not None else CancellationToken()
+        self.check_every = max(1, int(check_every))
+        self.start()
+
+    def start(self):
+        self._deadline = None if self.max_time is None else time.perf_counter() + self.max_time
+        self._calls = 0
+        self.reason = None
+
+    def exhausted(self, expanded, force=False):
+        # force=True skips the check_every sampling (for solvers that check rarely).
+        if self.reason is not None:
+            return True
+
+        if self.max_expanded is not None and expanded >= self.max_expanded:
+            self.reason = "expanded"
+            return True
+
+        self._calls += 1
+        if self._calls < self.check_every and not force:
+            return False
+        self._calls = 0
+
+        if self.token.cancelled:
+            self.reason = "cancelled"
+        elif self._deadline is not None and time.perf_counter() >= self._deadline:
+            self.reason = "time"
+        elif self.max_memory is not None and _current_memory() >= self.max_memory:
+            self.reason = "memory"
+        return self.reason is not None
+
+
+class _BudgetExhausted(Exception):
+    # Unwinds the recursive BacktrackingSearch when its budget runs out.
+    pass
+
 """
 Depth-first backtracking with simple 'explored' pruning.
 Stores the best (lowest-cost) path of states encountered to any goal.
@@ -23,13 +133,17 @@ returns a dictionary with the following informatin:
         
 """
 class BacktrackingSearch:
-    def __init__(self, problem: SearchProblem):
+    def __init__(self, problem: SearchProblem, budget: SearchBudget = None):
         self.best_cost = math.inf
         self.best_path = None
         self.explored = set()
         self.problem = problem
+        self.budget = budget
 
     def recurse(self, state, path, cost: int):
+        if self.budget is not None and self.budget.exhausted(len(self.explored)):
+            raise _BudgetExhausted()
+
         if self.problem.is_end(state):
        
             if cost < self.best_cost:
@@ -38,25 +152,31 @@ class BacktrackingSearch:
                 # print(self.best_cost)
             return
 
-        for action in self.problem.actions(state):
-            next_state = self.problem.succ(state, action)
+        for action, next_state, step_cost in self.problem.successors(state):
             key = str(next_state)
             # key = next_state
             if key not in self.explored:
                 
                 self.explored.add(key)
                 
-                self.recurse(next_state, path + [next_state], cost + self.problem.cost(state, action))
+                self.recurse(next_state, path + [next_state], cost + step_cost)
 
     def solve(self):
+        if self.budget is not None:
+            self.budget.start()
         start = self.problem.start_state()
         self.explored.add(str(start))
-        self.recurse(start, [], 0)
+        complete = True
+        try:
+            self.recurse(start, [], 0)
+        except _BudgetExhausted:
+            complete = False
         return dict(
             best_cost=self.best_cost,
             best_path=[self.problem.start_state()] + (self.best_path or []),
             found=(self.best_path is not None),
             expanded=len(self.explored),
+            complete=complete,
         )
 
 """
@@ -72,21 +192,29 @@ returns a dictionary with the following informatin:
 
 """
 class BacktrackingSearchIterative:
-    def __init__(self, problem):
+    def __init__(self, problem, budget: SearchBudget = None):
         self.best_cost = math.inf
         self.best_path = None
         self.explored = set()
         self.problem = problem
+        self.budget = budget
 
     def solve(self):
+        if self.budget is not None:
+            self.budget.start()
         start = self.problem.start_state()
         start_key = str(start)
         self.explored.add(start_key)
 
         # Stack holds tuples: (state, path_from_after_start, cost_so_far)
         stack = [(start, [], 0)]
+        complete = True
 
         while stack:
+            if self.budget is not None and self.budget.exhausted(len(self.explored)):
+                complete = False
+                break
+
             state, path, cost = stack.pop()
 
             # Goal check
@@ -97,14 +225,13 @@ class BacktrackingSearchIterative:
                 continue
 
             # Expand
-            actions = list(self.problem.actions(state))
+            successors = list(self.problem.successors(state))
             # To match recursive DFS order, push in reverse so first action is explored first.
-            for action in reversed(actions):
-                next_state = self.problem.succ(state, action)
+            for action, next_state, step_cost in reversed(successors):
                 key = str(next_state)
                 if key not in self.explored:
                     self.explored.add(key)
-                    next_cost = cost + self.problem.cost(state, action)
+                    next_cost = cost + step_cost
                     stack.append((next_state, path + [next_state], next_cost))
 
         return dict(
@@ -112,6 +239,7 @@ class BacktrackingSearchIterative:
             best_path=[self.problem.start_state()] + (self.best_path or []),
             found=(self.best_path is not None),
             expanded=len(self.explored),
+            complete=complete,
         )
 
 
@@ -126,11 +254,14 @@ returns a dictionary with the following informatin:
     expanded= # of state explored
 """
 class BFSSearch:
-    def __init__(self, problem: SearchProblem):
+    def __init__(self, problem: SearchProblem, budget: SearchBudget = None):
         self.problem = problem
+        self.budget = budget
 
     def solve(self):
         start_time = time.perf_counter()
+        if self.budget is not None:
+            self.budget.start()
 
         start = self.problem.start_state()
         explored = set([str(start)])
@@ -144,7 +275,13 @@ class BFSSearch:
         D = 0
         d = None
 
+        complete = True
+
         while q:
+            if self.budget is not None and self.budget.exhausted(expanded):
+                complete = False
+                break
+
             state, path, cost, depth = q.popleft()
 
             # Expand
@@ -165,17 +302,15 @@ class BFSSearch:
                     D=D,
                     d=d,
                     time=elapsed,
+                    complete=True,
                 )
 
-            actions = list(self.problem.actions(state))
-            generated += len(actions)
-
-            for action in actions:
-                nxt = self.problem.succ(state, action)
+            for action, nxt, step_cost in self.problem.successors(state):
+                generated += 1
                 k = str(nxt)
                 if k not in explored:
                     explored.add(k)
-                    q.append((nxt, path + [nxt], cost + self.problem.cost(state, action), depth + 1))
+                    q.append((nxt, path + [nxt], cost + step_cost, depth + 1))
 
         elapsed = time.perf_counter() - start_time
         b = (generated / expanded) if expanded else 0.0
@@ -188,6 +323,7 @@ class BFSSearch:
             D=D,
             d=d,
             time=elapsed,
+            complete=complete,
         )
 
 """
@@ -202,11 +338,14 @@ returns a dictionary with the following informatin:
     expanded= # of state explored
 """
 class DFSSearch:
-    def __init__(self, problem: SearchProblem):
+    def __init__(self, problem: SearchProblem, budget: SearchBudget = None):
         self.problem = problem
+        self.budget = budget
 
     def solve(self):
         start_time = time.perf_counter()
+        if self.budget is not None:
+            self.budget.start()
 
         start = self.problem.start_state()
         explored = set([str(start)])
@@ -223,7 +362,13 @@ class DFSSearch:
         best_cost = math.inf
         best_path = None
 
+        complete = True
+
         while stack:
+            if self.budget is not None and self.budget.exhausted(expanded):
+                complete = False
+                break
+
             state, path, cost, depth = stack.pop()
 
             # Expand
@@ -252,20 +397,20 @@ class DFSSearch:
                         D=D,
                         d=d,
                         time=elapsed,
+                        complete=True,
                     )
                 # If you prefer exploring entire space to compute D more fully,
                 # remove the early return above.
 
-            actions = list(self.problem.actions(state))
-            generated += len(actions)
+            successors = list(self.problem.successors(state))
+            generated += len(successors)
 
             # Reverse so first action is explored first (matches recursive order idea)
-            for action in reversed(actions):
-                nxt = self.problem.succ(state, action)
+            for action, nxt, step_cost in reversed(successors):
                 k = str(nxt)
                 if k not in explored:
                     explored.add(k)
-                    stack.append((nxt, path + [nxt], cost + self.problem.cost(state, action), depth + 1))
+                    stack.append((nxt, path + [nxt], cost + step_cost, depth + 1))
 
         elapsed = time.perf_counter() - start_time
         b = (generated / expanded) if expanded else 0.0
@@ -278,4 +423,1084 @@ class DFSSearch:
             D=D,
             d=d,
             time=elapsed,
-        )
\ No newline at end of file
+            complete=complete,
+        )
+
+
+"""
+Uniform-cost search (Dijkstra) for non-negative INTEGER action costs,
+e.g. NJugsProblem with a CostModel. Optimal for any such cost model,
+whereas BFS is only optimal for unit costs.
+
+Instead of a binary heap, the frontier is a Dial-style bucket queue: one
+bucket (list of states) per path cost g. Since costs are small integers,
+the next non-empty bucket is at most max action cost away, so push and
+pop are O(1) (amortized). Stale entries (a state re-pushed with a lower
+cost) are skipped when popped.
+
+returns the same dictionary as BFSSearch:
+    best_cost= minimum total cost,
+    best_path= [s_0, ..., s*],
+    found, expanded (# of states reached), b, D, d (number of steps of best_path),
+    time, complete
+"""
+class UniformCostSearch:
+    def __init__(self, problem: SearchProblem, budget: SearchBudget = None):
+        self.problem = problem
+        self.budget = budget
+
+    def solve(self):
+        start_time = time.perf_counter()
+        if self.budget is not None:
+            self.budget.start()
+
+        start = self.problem.start_state()
+        # state -> (g, depth, parent)
+        best = {start: (0, 0, None)}
+        closed = set()
+        buckets = {0: [start]}
+        queued = 1
+        g = 0
+
+        expanded = 0
+        generated = 0
+        D = 0
+        complete = True
+
+        while queued:
+            if self.budget is not None and self.budget.exhausted(expanded):
+                complete = False
+                break
+
+            # Advance to the next non-empty bucket.
+            bucket = buckets.get(g)
+            while not bucket:
+                buckets.pop(g, None)
+                g += 1
+                bucket = buckets.get(g)
+
+            state = bucket.pop()
+            queued -= 1
+            if state in closed or best[state][0] != g:
+                continue  # stale entry
+            closed.add(state)
+
+            depth = best[state][1]
+            expanded += 1
+            D = max(D, depth)
+
+            if self.problem.is_end(state):
+                path = [state]
+                while best[path[-1]][2] is not None:
+                    path.append(best[path[-1]][2])
+                path.reverse()
+                elapsed = time.perf_counter() - start_time
+                return dict(
+                    best_cost=g,
+                    best_path=path,
+                    found=True,
+                    expanded=len(best),
+                    b=(generated / expanded) if expanded else 0.0,
+                    D=D,
+                    d=depth,
+                    time=elapsed,
+                    complete=True,
+                )
+
+            for action, nxt, step_cost in self.problem.successors(state):
+                generated += 1
+                if nxt in closed:
+                    continue
+                g2 = g + step_cost
+                old = best.get(nxt)
+                if old is None or g2 < old[0]:
+                    best[nxt] = (g2, depth + 1, state)
+                    buckets.setdefault(g2, []).append(nxt)
+                    queued += 1
+
+        elapsed = time.perf_counter() - start_time
+        b = (generated / expanded) if expanded else 0.0
+        return dict(
+            best_cost=math.inf,
+            best_path=[start],
+            found=False,
+            expanded=len(best),
+            b=b,
+            D=D,
+            d=None,
+            time=elapsed,
+            complete=complete,
+        )
+
+
+def _path_cost(problem, path):
+    # Cost of a path of states (cheapest action between consecutive states).
+    cost = 0
+    for u, v in zip(path, path[1:]):
+        cost += min(c for _, nxt, c in problem.successors(u) if nxt == v)
+    return cost
+
+
+"""
+All the shortest (fewest actions) solutions, from a single BFS.
+
+Instead of enumerating paths (exponential), the BFS keeps the shortest-path
+DAG: the edges u -> v with depth(v) = depth(u) + 1, restricted to the states
+that lie on some shortest path to a goal. On that DAG, a dynamic program
+gives, for every state, the number of shortest paths from it to a goal
+(exact Python big ints). This makes it possible to:
+    count()        -> number of shortest solutions
+    paths()        -> lazy generator of the shortest solutions, one at a time,
+                      in a fixed order (lexicographic in the action order);
+                      each path costs O(d) amortized, since the DAG has no dead ends
+    path(k)        -> the k-th path of that order (0 <= k < count()), in
+                      O(d * log b) steps (binary search on per-state cumulative counts)
+    sample(rng)    -> a uniformly random shortest solution, same cost as path(k)
+    solve()        -> same dictionary as BFSSearch (with the first path),
+                      plus num_shortest_paths
+
+"Shortest" means fewest actions, i.e. optimal for the unit cost.
+"""
+class ShortestPathsDAG:
+    def __init__(self, problem: SearchProblem):
+        self.problem = problem
+        self._built = False
+
+    def build(self):
+        start_time = time.perf_counter()
+        problem = self.problem
+        start = problem.start_state()
+
+        depth = {start: 0}
+        levels = [[start]]
+        children = {}
+        goals = []
+        generated = 0
+        expanded = 0
+
+        while levels[-1]:
+            frontier = levels[-1]
+            goals = [s for s in frontier if problem.is_end(s)]
+            if goals:
+                break
+
+            level = len(levels) - 1
+            nxt = []
+            for u in frontier:
+                expanded += 1
+                kids = []
+                for _, v, _ in problem.successors(u):
+                    generated += 1
+                    dv = depth.get(v)
+                    if dv is None:
+                        dv = depth[v] = level + 1
+                        nxt.append(v)
+                    if dv == level + 1 and v not in kids:
+                        kids.append(v)
+                children[u] = kids
+            levels.append(nxt)
+
+        # Number of shortest paths from each state to a goal (0 = not on any).
+        to_goal = {g: 1 for g in goals}
+        if goals:
+            for frontier in reversed(levels[:-1]):
+                for u in frontier:
+                    c = sum(to_goal.get(v, 0) for v in children[u])
+                    if c:
+                        to_goal[u] = c
+
+        self.start = start
+        self.d = (len(levels) - 1) if goals else None
+        self.goals = set(goals)
+        self.to_goal = to_goal
+        self.children = {u: [v for v in kids if v in to_goal] for u, kids in children.items() if u in to_goal}
+        # Running totals of to_goal over each state's children, for path(k).
+        self.cumulative = {u: list(itertools.accumulate(to_goal[v] for v in kids))
+                           for u, kids in self.children.items()}
+        self.stats = dict(
+            expanded=len(depth),
+            b=(generated / expanded) if expanded else 0.0,
+            D=len(levels) - 1 if goals else len(levels) - 2,
+            time=time.perf_counter() - start_time,
+        )
+        self._built = True
+        return self
+
+    def _ensure_built(self):
+        if not self._built:
+            self.build()
+
+    def count(self):
+        self._ensure_built()
+        return self.to_goal.get(self.start, 0)
+
+    def paths(self):
+        self._ensure_built()
+        if not self.count():
+            return
+
+        path = [self.start]
+        stack = [iter(self.children.get(self.start, ()))]
+        if self.start in self.goals:
+            yield list(path)
+            return
+
+        while stack:
+            v = next(stack[-1], None)
+            if v is None:
+                stack.pop()
+                path.pop()
+                continue
+            path.append(v)
+            if v in self.goals:
+                yield list(path)
+                path.pop()
+            else:
+                stack.append(iter(self.children[v]))
+
+    def path(self, k):
+        self._ensure_built()
+        if not 0 <= k < self.count():
+            raise IndexError("Path index out of range.")
+
+        u = self.start
+        path = [u]
+        while u not in self.goals:
+            cumulative = self.cumulative[u]
+            i = bisect.bisect_right(cumulative, k)
+            if i:
+                k -= cumulative[i - 1]
+            u = self.children[u][i]
+            path.append(u)
+        return path
+
+    def sample(self, rng=None):
+        self._ensure_built()
+        if not self.count():
+            return None
+        rng = rng if rng is not None else random
+        return self.path(rng.randrange(self.count()))
+
+    def solve(self):
+        self._ensure_built()
+        count = self.count()
+        first = next(self.paths(), None)
+        return dict(
+            best_cost=_path_cost(self.problem, first) if first else math.inf,
+            best_path=first if first else [self.start],
+            found=first is not None,
+            expanded=self.stats["expanded"],
+            b=self.stats["b"],
+            D=self.stats["D"],
+            d=self.d,
+            time=self.stats["time"],
+            complete=True,
+            num_shortest_paths=count,
+        )
+
+
+# ------------------------------------------------------------
+# Bounded-memory heuristic search (beam, greedy best-first)
+# ------------------------------------------------------------
+
+def _min_action_cost(problem):
+    cm = getattr(problem, "cost_model", None)
+    if cm is None:
+        return 1
+    return min(cm.fill + cm.fill_per_liter, cm.empty + cm.empty_per_liter, cm.pour + cm.pour_per_liter)
+
+
+"""
+Admissible heuristic for NJugsProblem: every action changes at most two jugs,
+so at least ceil(#jugs different from the goal / 2) more actions are needed,
+each costing at least the cheapest possible action.
+"""
+def mismatch_heuristic(problem, state):
+    mismatches = sum(1 for s, g in zip(state, problem.goal) if s != g)
+    return ((mismatches + 1) // 2) * _min_action_cost(problem)
+
+
+"""
+Non-admissible but more informative heuristic for NJugsProblem: the total
+amount of water that is misplaced, in units of the largest jug.
+"""
+def volume_heuristic(problem, state):
+    return sum(abs(s - g) for s, g in zip(state, problem.goal)) / max(problem.capacities)
+
+
+def _gap_ratio(gap, lower_bound):
+    if gap == 0:
+        return 0.0
+    return gap / lower_bound if lower_bound > 0 else math.inf
+
+
+def _heuristic_result(start_time, start, found_path, cost, stored, expanded, generated,
+                      D, lower_bound, complete):
+    elapsed = time.perf_counter() - start_time
+    found = found_path is not None
+    gap = (cost - lower_bound) if found else math.inf
+    return dict(
+        best_cost=cost if found else math.inf,
+        best_path=found_path if found else [start],
+        found=found,
+        expanded=stored,
+        b=(generated / expanded) if expanded else 0.0,
+        D=D,
+        d=(len(found_path) - 1) if found else None,
+        time=elapsed,
+        complete=complete,
+        lower_bound=lower_bound,
+        gap=gap,
+        gap_ratio=_gap_ratio(gap, lower_bound),
+    )
+
+
+def _rebuild(parents, state):
+    path = [state]
+    while parents[path[-1]][1] is not None:
+        path.append(parents[path[-1]][1])
+    path.reverse()
+    return path
+
+
+"""
+Beam search: explores the search space level by level like BFS, but keeps
+only the ``beam_width`` most promising new states of each level, ranked by
+g + heuristic(problem, state). Fast and memory-bounded, but neither complete
+nor optimal.
+
+    heuristic=   function (problem, state) -> estimated remaining cost
+                 (default: mismatch_heuristic)
+    max_states=  hard cap on the number of states kept in memory; the search
+                 stops (complete=False) when it is reached
+    lower_bound= known lower bound on the optimal cost, used to report how far
+                 the solution may be from optimal (default: the admissible
+                 mismatch_heuristic of the start state). The default is weak
+                 (at most ceil(#jugs / 2) actions), so the reported gap is
+                 usually pessimistic; pass e.g. the cost found by an optimal
+                 solver on a relaxed or smaller instance for a tighter one.
+
+complete=False whenever some states were dropped (beam truncation, max_states
+or budget), since an unsolved search is then not a proof that there is no
+solution.
+
+returns the same dictionary as BFSSearch, plus:
+    lower_bound, gap= best_cost - lower_bound,
+    gap_ratio= gap / lower_bound (inf if the lower bound is 0 but the gap is not)
+"""
+class BeamSearch:
+    def __init__(self, problem: SearchProblem, beam_width=100, heuristic=None,
+                 max_states=1_000_000, lower_bound=None, budget: SearchBudget = None):
+        if beam_width < 1:
+            raise ValueError("beam_width must be at least 1.")
+        self.problem = problem
+        self.beam_width = beam_width
+        self.heuristic = heuristic or mismatch_heuristic
+        self.max_states = max_states
+        self.lower_bound = lower_bound
+        self.budget = budget
+
+    def solve(self):
+        start_time = time.perf_counter()
+        if self.budget is not None:
+            self.budget.start()
+
+        problem = self.problem
+        h = self.heuristic
+        start = problem.start_state()
+        lower_bound = self.lower_bound if self.lower_bound is not None else mismatch_heuristic(problem, start)
+
+        # state -> (g, parent)
+        parents = {start: (0, None)}
+        beam = [start]
+        expanded = 0
+        generated = 0
+        depth = 0
+        complete = True
+        pruned = False
+
+        if problem.is_end(start):
+            return _heuristic_result(start_time, start, [start], 0, 1, 0, 0, 0, lower_bound, True)
+
+        while beam:
+            candidates = {}
+            for u in beam:
+                if self.budget is not None and self.budget.exhausted(expanded):
+                    complete = False
+                    break
+                expanded += 1
+                gu = parents[u][0]
+                for _, v, c in problem.successors(u):
+                    generated += 1
+                    gv = gu + c
+                    if v in parents or (v in candidates and candidates[v][0] <= gv):
+                        continue
+                    candidates[v] = (gv, u)
+            if not complete:
+                break
+
+            depth += 1
+            goals = [v for v in candidates if problem.is_end(v)]
+            if goals:
+                goal = min(goals, key=lambda v: candidates[v][0])
+                parents[goal] = candidates[goal]
+                return _heuristic_result(start_time, start, _rebuild(parents, goal), candidates[goal][0],
+                                         len(parents), expanded, generated, depth, lower_bound, not pruned)
+
+            ranked = sorted(candidates, key=lambda v: (candidates[v][0] + h(problem, v), candidates[v][0]))
+            beam = ranked[:self.beam_width]
+            pruned = pruned or len(ranked) > self.beam_width
+            if len(parents) + len(beam) > self.max_states:
+                complete = False
+                break
+            for v in beam:
+                parents[v] = candidates[v]
+
+        return _heuristic_result(start_time, start, None, math.inf, len(parents), expanded, generated,
+                                 depth, lower_bound, complete and not pruned)
+
+
+"""
+Greedy best-first search: always expands the frontier state with the lowest
+heuristic(problem, state) (ties broken by cost so far). Usually finds a
+solution after very few expansions, but it is not optimal.
+
+    max_frontier= the frontier is trimmed to its best ``max_frontier`` states
+                  when it grows beyond twice that size (complete=False then);
+                  the dropped states are forgotten and may be reached again
+    max_states=   hard cap on the number of states kept in memory (explored
+                  plus frontier); the search stops (complete=False) when it is reached
+    heuristic, lower_bound: as in BeamSearch
+
+returns the same dictionary as BeamSearch.
+"""
+class GreedyBestFirstSearch:
+    def __init__(self, problem: SearchProblem, heuristic=None, max_frontier=100_000,
+                 max_states=1_000_000, lower_bound=None, budget: SearchBudget = None):
+        if max_frontier < 1:
+            raise ValueError("max_frontier must be at least 1.")
+        self.problem = problem
+        self.heuristic = heuristic or mismatch_heuristic
+        self.max_frontier = max_frontier
+        self.max_states = max_states
+        self.lower_bound = lower_bound
+        self.budget = budget
+
+    def solve(self):
+        start_time = time.perf_counter()
+        if self.budget is not None:
+            self.budget.start()
+
+        problem = self.problem
+        h = self.heuristic
+        start = problem.start_state()
+        lower_bound = self.lower_bound if self.lower_bound is not None else mismatch_heuristic(problem, start)
+
+        # state -> (g, parent)
+        parents = {start: (0, None)}
+        closed = set()
+        # (h, g, tie, state)
+        tie = 0
+        frontier = [(h(problem, start), 0, tie, start)]
+        expanded = 0
+        generated = 0
+        D = 0
+        depth = {start: 0}
+        complete = True
+        pruned = False
+
+        while frontier:
+            if self.budget is not None and self.budget.exhausted(expanded):
+                complete = False
+                break
+
+            _, g, _, u = heapq.heappop(frontier)
+            if u in closed or parents[u][0] != g:
+                continue
+            closed.add(u)
+            expanded += 1
+            D = max(D, depth[u])
+
+            if problem.is_end(u):
+                return _heuristic_result(start_time, start, _rebuild(parents, u), g, len(parents),
+                                         expanded, generated, D, lower_bound, not pruned)
+
+            for _, v, c in problem.successors(u):
+                generated += 1
+                gv = g + c
+                if v in closed or (v in parents and parents[v][0] <= gv):
+                    continue
+                parents[v] = (gv, u)
+                depth[v] = depth[u] + 1
+                tie += 1
+                heapq.heappush(frontier, (h(problem, v), gv, tie, v))
+
+            if len(frontier) > 2 * self.max_frontier:
+                frontier.sort()
+                for _, gv, _, v in frontier[self.max_frontier:]:
+                    if v not in closed and v in parents and parents[v][0] == gv:
+                        # Forget dropped states entirely: this frees them, and
+                        # lets them be found again later.
+                        del parents[v]
+                        del depth[v]
+                # A sorted list is a valid heap; stale entries are dropped too.
+                frontier = [e for e in frontier[:self.max_frontier]
+                            if e[3] in parents and e[3] not in closed and parents[e[3]][0] == e[1]]
+                pruned = True
+            if len(closed) + len(frontier) > self.max_states:
+                complete = False
+                break
+
+        return _heuristic_result(start_time, start, None, math.inf, len(parents), expanded, generated,
+                                 D, lower_bound, complete and not pruned)
+
+
+# ------------------------------------------------------------
+# External-memory (disk-backed) BFS
+# ------------------------------------------------------------
+
+# Largest number of encoded states read from / written to disk at a time.
+_IO_BLOCK_STATES = 65536
+
+
+def _read_packed(path, record_size, block_states=_IO_BLOCK_STATES):
+    """Yields the fixed-size binary records of ``path`` one by one."""
+    block = record_size * block_states
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(block)
+            if not data:
+                return
+            for off in range(0, len(data), record_size):
+                yield data[off:off + record_size]
+
+
+def _write_packed(path, records, block_states=_IO_BLOCK_STATES):
+    """Writes the binary records to ``path`` and returns how many were written."""
+    count = 0
+    buf = []
+    with open(path, "wb") as f:
+        for rec in records:
+            buf.append(rec)
+            if len(buf) >= block_states:
+                f.write(b"".join(buf))
+                count += len(buf)
+                buf = []
+        if buf:
+            f.write(b"".join(buf))
+            count += len(buf)
+    return count
+
+
+def _unique(sorted_records):
+    """Drops consecutive duplicates from a sorted stream."""
+    last = None
+    for rec in sorted_records:
+        if rec != last:
+            yield rec
+            last = rec
+
+
+def _difference(sorted_records, sorted_exclude):
+    """Yields the records of the first sorted stream that are not in the second one."""
+    exclude = iter(sorted_exclude)
+    ex = next(exclude, None)
+    for rec in sorted_records:
+        while ex is not None and ex < rec:
+            ex = next(exclude, None)
+        if rec != ex:
+            yield rec
+
+
+"""
+Breadth-first search that keeps its frontier on disk instead of in memory.
+Meant for state spaces (e.g. 5-8 jugs with capacities in the hundreds) whose
+``explored`` set would not fit in RAM.
+
+States are encoded as fixed-width big-endian unsigned ints, so that the
+byte order of an encoded state is the same as the order of the tuple.
+Each BFS layer is stored as a sorted file of unique encoded states:
+    1. the current layer is streamed from disk and expanded; successors are
+       buffered in memory (at most ``max_states_in_memory``), then sorted and
+       spilled to a run file whenever the buffer is full,
+    2. the runs are merged (k-way, at most ``merge_fan_in`` files at a time),
+       duplicates are removed and the states already visited are subtracted
+       with a two-way streaming merge; the rest is the next layer,
+    3. the next layer is merged into the sorted "visited" file.
+
+The jug graph is directed (e.g. "fill" cannot always be undone in one step),
+so, unlike the classic undirected trick of keeping only the last two layers,
+duplicates are removed against ALL previously visited states (kept in one
+cumulative file, so the number of open files does not grow with the depth).
+Otherwise cycles would be re-expanded forever when the goal is unreachable.
+
+The solution path is rebuilt backwards at the end, one layer scan per step,
+so it does not require keeping parent pointers in memory.
+
+Memory is bounded by ``max_states_in_memory`` encoded states: the I/O
+buffers hold ``max_states_in_memory // (merge_fan_in + 2)`` states each
+(capped at 65536), so the up to merge_fan_in + 2 files open during a merge
+fit in that bound; while expanding a layer, the successor buffer adds to
+the buffers of its two open files (about 2 blocks).
+
+Temporary files live in ``workdir`` (default: the system temp directory)
+and are removed when the search returns.
+
+returns the same dictionary as BFSSearch:
+    best_cost, best_path, found, expanded, b, D, d, time, complete
+except that "expanded" counts the states discovered up to the level of the
+goal, whereas BFSSearch also counts the part of the next level it generated
+before popping the goal.
+"""
+class ExternalBFSSearch:
+    def __init__(self, problem: SearchProblem, max_states_in_memory=1_000_000,
+                 workdir=None, merge_fan_in=64, budget: SearchBudget = None):
+        if max_states_in_memory < 1:
+            raise ValueError("max_states_in_memory must be at least 1.")
+        if merge_fan_in < 2:
+            raise ValueError("merge_fan_in must be at least 2.")
+
+        self.problem = problem
+        self.max_states_in_memory = max_states_in_memory
+        self.workdir = workdir
+        self.merge_fan_in = merge_fan_in
+        self.budget = budget
+        # Records per I/O buffer: a merge keeps merge_fan_in + 2 files open.
+        self.block_states = max(1, min(_IO_BLOCK_STATES, max_states_in_memory // (merge_fan_in + 2)))
+
+    # ---- helpers ----
+
+    def _read(self, path):
+        return _read_packed(path, self.record_size, self.block_states)
+
+    def _write(self, path, records):
+        return _write_packed(path, records, self.block_states)
+
+    def _spill(self, buf, path):
+        buf.sort()
+        self._write(path, _unique(buf))
+        return path
+
+    def _merge_runs(self, runs, tmp, tag):
+        # Reduce the number of runs until they can all be merged at once.
+        generation = 0
+        while len(runs) > self.merge_fan_in:
+            merged = []
+            for k in range(0, len(runs), self.merge_fan_in):
+                group = runs[k:k + self.merge_fan_in]
+                out = os.path.join(tmp, f"{tag}_m{generation}_{k}.bin")
+                self._write(out, _unique(heapq.merge(*(self._read(r) for r in group))))
+                for r in group:
+                    os.remove(r)
+                merged.append(out)
+            runs = merged
+            generation += 1
+        return runs
+
+    def _rebuild_path(self, layers, goal):
+        # Returns (path, cost): walks back one layer at a time, looking for a parent.
+        path = [goal]
+        cost = 0
+        target = goal
+        for layer in reversed(layers[:-1]):
+            for rec in self._read(layer):
+                state = self.codec.unpack(rec)
+                step_cost = next((c for _, nxt, c in self.problem.successors(state) if nxt == target), None)
+                if step_cost is not None:
+                    cost += step_cost
+                    target = state
+                    break
+            path.append(target)
+        path.reverse()
+        return path, cost
+
+    def solve(self):
+        start_time = time.perf_counter()
+        if self.budget is not None:
+            self.budget.start()
+
+        problem = self.problem
+        start = problem.start_state()
+        self.codec = struct.Struct(">%dI" % len(start))
+        self.record_size = self.codec.size
+        pack = self.codec.pack
+        unpack = self.codec.unpack
+
+        expanded = 0
+        generated = 0
+        discovered = 1
+        D = 0
+        complete = True
+
+        with tempfile.TemporaryDirectory(prefix="jugs_bfs_", dir=self.workdir) as tmp:
+            layers = [os.path.join(tmp, "layer_0.bin")]
+            self._write(layers[0], [pack(*start)])
+            visited = os.path.join(tmp, "visited_0.bin")
+            self._write(visited, [pack(*start)])
+
+            depth = 0
+            while True:
+                D = depth
+                runs = []
+                buf = []
+
+                for rec in self._read(layers[-1]):
+                    if self.budget is not None and self.budget.exhausted(expanded):
+                        complete = False
+                        break
+
+                    state = unpack(rec)
+                    expanded += 1
+
+                    # Goal check (BFS => first goal is shallowest)
+                    if problem.is_end(state):
+                        path, cost = self._rebuild_path(layers, state)
+                        elapsed = time.perf_counter() - start_time
+                        return dict(
+                            best_cost=cost,
+                            best_path=path,
+                            found=True,
+                            expanded=discovered,
+                            b=(generated / expanded) if expanded else 0.0,
+                            D=D,
+                            d=depth,
+                            time=elapsed,
+                            complete=True,
+                        )
+
+                    for _, nxt, _ in problem.successors(state):
+                        generated += 1
+                        buf.append(pack(*nxt))
+                    if len(buf) >= self.max_states_in_memory:
+                        runs.append(self._spill(buf, os.path.join(tmp, f"run_{depth}_{len(runs)}.bin")))
+                        buf = []
+
+                if not complete:
+                    break
+                if buf:
+                    runs.append(self._spill(buf, os.path.join(tmp, f"run_{depth}_{len(runs)}.bin")))
+                    buf = []
+                if not runs:
+                    break
+
+                runs = self._merge_runs(runs, tmp, f"run_{depth}")
+                candidates = _unique(heapq.merge(*(self._read(r) for r in runs)))
+                seen = self._read(visited)
+
+                next_layer = os.path.join(tmp, f"layer_{depth + 1}.bin")
+                count = self._write(next_layer, _difference(candidates, seen))
+                for r in runs:
+                    os.remove(r)
+
+                if count == 0:
+                    os.remove(next_layer)
+                    break
+                discovered += count
+                layers.append(next_layer)
+                depth += 1
+
+                # Both files are sorted and disjoint: a plain two-way merge.
+                merged = os.path.join(tmp, f"visited_{depth}.bin")
+                self._write(merged, heapq.merge(self._read(visited), self._read(next_layer)))
+                os.remove(visited)
+                visited = merged
+
+        elapsed = time.perf_counter() - start_time
+        b = (generated / expanded) if expanded else 0.0
+        return dict(
+            best_cost=math.inf,
+            best_path=[start],
+            found=False,
+            expanded=discovered,
+            b=b,
+            D=D,
+            d=None,
+            time=elapsed,
+            complete=complete,
+        )
+
+
+# ------------------------------------------------------------
+# Multi-core level-synchronous BFS
+# ------------------------------------------------------------
+
+def _pbfs_worker(rank, workers, problem, inboxes, conn):
+    # Every reply is ("ok", payload), or ("error", traceback) if the worker fails.
+    try:
+        _pbfs_worker_loop(rank, workers, problem, inboxes, conn)
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+
+
+def _pbfs_worker_loop(rank, workers, problem, inboxes, conn):
+    n = len(problem.start_state())
+    state_codec = struct.Struct(">%dI" % n)
+    pair_codec = struct.Struct(">%dI" % (2 * n))
+
+    # This worker's shard of the explored set: state -> parent (None for the start).
+    visited = {}
+    frontier = []
+
+    while True:
+        cmd, arg = conn.recv()
+
+        if cmd == "seed":
+            visited[arg] = None
+            frontier = [arg]
+
+        elif cmd == "expand":
+            # 1. expand the local frontier, route each successor to its owner
+            outgoing = [dict() for _ in range(workers)]
+            generated = 0
+            for u in frontier:
+                pu = state_codec.pack(*u)
+                for _, v, _ in problem.successors(u):
+                    generated += 1
+                    pv = state_codec.pack(*v)
+                    out = outgoing[zlib.crc32(pv) % workers]
+                    if pv not in out:
+                        out[pv] = pu
+            for k in range(workers):
+                inboxes[k].put(b"".join(pv + pu for pv, pu in outgoing[k].items()))
+
+            # 2. receive the successors this worker owns, keep the new ones
+            new = []
+            found = None
+            for _ in range(workers):
+                for values in pair_codec.iter_unpack(inboxes[rank].get()):
+                    v = values[:n]
+                    if v not in visited:
+                        visited[v] = values[n:]
+                        new.append(v)
+                        if found is None and problem.is_end(v):
+                            found = v
+
+            # The shard lives here, so the memory budget needs this process's RSS.
+            conn.send(("ok", (len(frontier), generated, len(new), found, _current_memory())))
+            frontier = new
+
+        elif cmd == "parent":
+            conn.send(("ok", visited.get(arg)))
+
+        elif cmd == "stop":
+            return
+
+
+"""
+Level-synchronous parallel BFS for a single large instance.
+
+The explored set is split into ``workers`` disjoint shards: a state is owned
+by the worker (process) given by a hash of its encoded (packed) form. For each
+BFS level, every worker expands the frontier states it owns, sends each
+successor (with its parent) to the successor's owner through that owner's
+inbox queue, then removes the duplicates against its own shard only; the
+states that are new form its share of the next level. The main process only
+synchronizes the levels and rebuilds the path at the end by asking each owner
+for the parent of a state.
+
+Finds the same shortest cost and d as BFSSearch (the returned path may be a
+different shortest path). Process start-up and messaging have a cost, so it
+only pays off on large instances with several cores.
+A budget (if any) is checked once per level; its max_memory applies to the
+total resident memory of the main process and of all the workers.
+
+Workers are forked when that is safe; if the calling process already runs
+other threads (e.g. solve() called through solve_async), forking is not, so
+"forkserver" (or "spawn") is used instead and the problem must be picklable.
+If a worker fails or dies, the other workers are terminated and solve()
+raises RuntimeError.
+
+returns the same dictionary as BFSSearch, except that "expanded" counts the
+states discovered up to the level of the goal, whereas BFSSearch also counts
+the part of the next level it generated before popping the goal.
+"""
+class ParallelBFSSearch:
+    def __init__(self, problem: SearchProblem, workers=None, budget: SearchBudget = None):
+        self.problem = problem
+        self.workers = workers or os.cpu_count() or 1
+        self.budget = budget
+
+    def _owner(self, state):
+        return zlib.crc32(struct.pack(">%dI" % len(state), *state)) % self.workers
+
+    def _context(self):
+        methods = multiprocessing.get_all_start_methods()
+        if "fork" in methods and threading.active_count() == 1:
+            return multiprocessing.get_context("fork")
+        return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+    def _read(self, rank):
+        try:
+            status, payload = self._conns[rank].recv()
+        except (EOFError, OSError):
+            raise RuntimeError(f"Parallel BFS worker {rank} died "
+                               f"(exit code {self._procs[rank].exitcode}).") from None
+        if status == "error":
+            raise RuntimeError(f"Parallel BFS worker {rank} failed:\n{payload}")
+        return payload
+
+    def _recv(self, rank):
+        # Waits for worker ``rank``'s reply, failing if any worker has died.
+        while not self._conns[rank].poll(0.1):
+            for k, proc in enumerate(self._procs):
+                if proc.exitcode is not None:
+                    # Report its error message if it managed to send one.
+                    if self._conns[k].poll():
+                        self._read(k)
+                    raise RuntimeError(f"Parallel BFS worker {k} died (exit code {proc.exitcode}).")
+        return self._read(rank)
+
+    def solve(self):
+        start_time = time.perf_counter()
+        if self.budget is not None:
+            self.budget.start()
+
+        problem = self.problem
+        start = problem.start_state()
+        if problem.is_end(start):
+            return dict(best_cost=0, best_path=[start], found=True, expanded=1, b=0.0,
+                        D=0, d=0, time=time.perf_counter() - start_time, complete=True)
+
+        ctx = self._context()
+        inboxes = [ctx.Queue() for _ in range(self.workers)]
+        conns = self._conns = []
+        procs = self._procs = []
+        for rank in range(self.workers):
+            parent_conn, child_conn = ctx.Pipe()
+            proc = ctx.Process(target=_pbfs_worker, daemon=True,
+                               args=(rank, self.workers, problem, inboxes, child_conn))
+            proc.start()
+            # Only the worker keeps its end: a dead worker then shows up as EOF.
+            child_conn.close()
+            conns.append(parent_conn)
+            procs.append(proc)
+
+        expanded = 0
+        generated = 0
+        discovered = 1
+        depth = 0
+        goal = None
+        complete = True
+        failed = True
+        workers_memory = 0
+        try:
+            conns[self._owner(start)].send(("seed", start))
+
+            while True:
+                if self.budget is not None and self.budget.exhausted(expanded, force=True):
+                    complete = False
+                    break
+                if (self.budget is not None and self.budget.max_memory is not None
+                        and workers_memory + _current_memory() >= self.budget.max_memory):
+                    self.budget.reason = "memory"
+                    complete = False
+                    break
+
+                for conn in conns:
+                    conn.send(("expand", None))
+                new = 0
+                workers_memory = 0
+                for rank in range(self.workers):
+                    e, g, k, found, memory = self._recv(rank)
+                    workers_memory += memory
+                    expanded += e
+                    generated += g
+                    new += k
+                    if found is not None and goal is None:
+                        goal = found
+
+                discovered += new
+                if new == 0:
+                    break
+                depth += 1
+                if goal is not None:
+                    break
+
+            path = None
+            if goal is not None:
+                path = [goal]
+                while True:
+                    owner = self._owner(path[-1])
+                    conns[owner].send(("parent", path[-1]))
+                    parent = self._recv(owner)
+                    if parent is None:
+                        break
+                    path.append(tuple(parent))
+                path.reverse()
+            failed = False
+        finally:
+            if not failed:
+                for conn in conns:
+                    try:
+                        conn.send(("stop", None))
+                    except (BrokenPipeError, OSError):
+                        pass
+            for proc in procs:
+                if failed:
+                    proc.terminate()
+                proc.join(timeout=5)
+                if proc.is_alive():
+                    proc.terminate()
+                    proc.join()
+            for conn in conns:
+                conn.close()
+            for q in inboxes:
+                q.close()
+                q.cancel_join_thread()
+
+        elapsed = time.perf_counter() - start_time
+        b = (generated / expanded) if expanded else 0.0
+        return dict(
+            best_cost=_path_cost(problem, path) if path else math.inf,
+            best_path=path if path else [start],
+            found=path is not None,
+            expanded=discovered,
+            b=b,
+            D=depth,
+            d=depth if path else None,
+            time=elapsed,
+            complete=complete,
+        )
+
+
+# ------------------------------------------------------------
+# Cooperative asyncio wrapper
+# ------------------------------------------------------------
+
+"""
+Runs ``solver.solve()`` in a worker thread without blocking the event loop.
+
+If the awaiting task is cancelled, the solver's cancellation token is
+triggered so the worker thread stops at its next budget check (the partial
+result is discarded and CancelledError is propagated).
+A solver created without a budget gets an unlimited one, only for its token.
+
+    executor= concurrent.futures executor to use (default: the loop's one)
+"""
+async def solve_async(solver, executor=None):
+    if getattr(solver, "budget", None) is None:
+        solver.budget = SearchBudget()
+    token = solver.budget.token
+
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor, solver.solve)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        token.cancel()
+        await asyncio.wait([future])
+        raise
+
+
+"""
+Runs many (budgeted) solvers concurrently, at most ``max_concurrency`` at a
+time, and returns their results in the same order as ``solvers``.
+"""
+async def solve_many_async(solvers, max_concurrency=8, executor=None):
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(solver):
+        async with semaphore:
+            return await solve_async(solver, executor)
+
+    return await asyncio.gather(*(run(s) for s in solvers))
@@ -19,11 +19,66 @@ class SearchProblem:
     def is_end(self, state):
         raise NotImplementedError()
 
+    def successors(self, state):
+        # Yields (action, next_state, cost) for every action available in state.
+        # Subclasses may override it with a faster, fused implementation.
+        for action in self.actions(state):
+            yield action, self.succ(state, action), self.cost(state, action)
+
 
 # Action = of type Tuple[str, int, Optional[int]]  # ('fill', i, None) | ('empty', i, None) | ('pour', i, j)
 # State = of type Tuple[int, ...] 
 
 
+class CostModel:
+    """
+    Integer cost of the jug actions:
+        cost = <kind> + <kind>_per_liter * (liters moved by the action)
+    where the liters moved are capacity - amount for fill(i), amount for
+    empty(i) and the amount poured for pour(i, j).
+
+    The default CostModel() is the unit cost (every action costs 1).
+    All prices must be non-negative integers.
+    """
+
+    def __init__(self, fill=1, empty=1, pour=1, fill_per_liter=0, empty_per_liter=0, pour_per_liter=0):
+        prices = (fill, empty, pour, fill_per_liter, empty_per_liter, pour_per_liter)
+        if any(int(p) != p or p < 0 for p in prices):
+            raise ValueError("Action costs must be non-negative integers.")
+
+        self.fill, self.empty, self.pour = int(fill), int(empty), int(pour)
+        self.fill_per_liter = int(fill_per_liter)
+        self.empty_per_liter = int(empty_per_liter)
+        self.pour_per_liter = int(pour_per_liter)
+
+    @property
+    def is_unit(self):
+        return self.as_tuple() == (1, 1, 1, 0, 0, 0)
+
+    def as_tuple(self):
+        return (self.fill, self.empty, self.pour,
+                self.fill_per_liter, self.empty_per_liter, self.pour_per_liter)
+
+    def action_cost(self, kind, liters):
+        if kind == "fill":
+            return self.fill + self.fill_per_liter * liters
+        if kind == "empty":
+            return self.empty + self.empty_per_liter * liters
+        if kind == "pour":
+            return self.pour + self.pour_per_liter * liters
+        raise ValueError("Unknown action type.")
+
+    def max_cost(self, capacities):
+        # Upper bound on the cost of a single action.
+        c = max(capacities)
+        return max(self.fill + self.fill_per_liter * c,
+                   self.empty + self.empty_per_liter * c,
+                   self.pour + self.pour_per_liter * c)
+
+    def __repr__(self):
+        return "CostModel(fill=%d, empty=%d, pour=%d, fill_per_liter=%d, empty_per_liter=%d, pour_per_liter=%d)" % self.as_tuple()
+
+
 class NJugsProblem(SearchProblem):
     """
     N-jugs problem with the standard operations:
@@ -32,10 +87,10 @@ class NJugsProblem(SearchProblem):
       - pour(i, j): pour from jug i into jug j until i is empty or j is full
 
     State is an N-tuple of amounts (non-negative ints).
-    Cost per action defaults to 1 (can be changed with cost_per_move).
+    Cost per action defaults to 1 (can be changed with cost_model, see CostModel).
     """
 
-    def __init__(self, capacities, goal):
+    def __init__(self, capacities, goal, cost_model=None):
         caps = tuple(int(c) for c in capacities)
         if any(c <= 0 for c in caps):
             raise ValueError("All capacities must be positive integers.")
@@ -51,6 +106,15 @@ class NJugsProblem(SearchProblem):
         self.capacities = caps
         self.n = len(caps)
         self._goal = tuple(goal)
+        self.cost_model = cost_model if cost_model is not None else CostModel()
+
+        # Precomputed action tuples used by successors().
+        self._fill_actions = tuple(("fill", i, None) for i in range(self.n))
+        self._empty_actions = tuple(("empty", i, None) for i in range(self.n))
+        self._pours = tuple(
+            tuple((j, ("pour", i, j)) for j in range(self.n) if j != i)
+            for i in range(self.n)
+        )
 
     # ---- SearchProblem API ----
     def start_state(self):
@@ -60,8 +124,17 @@ class NJugsProblem(SearchProblem):
         return state == self._goal
 
     def cost(self, state, action) -> int:
-        # Unit cost per move by default 1.
-        return 1
+        # Unit cost per move by default 1 (see CostModel).
+        kind, i, j = action
+        if kind == "fill":
+            liters = self.capacities[i] - state[i]
+        elif kind == "empty":
+            liters = state[i]
+        elif kind == "pour":
+            liters = min(state[i], self.capacities[j] - state[j])
+        else:
+            raise ValueError("Unknown action type.")
+        return self.cost_model.action_cost(kind, liters)
 
     """
     Returns the set of all possible actions available on the current state of the jugs.
@@ -146,6 +219,35 @@ class NJugsProblem(SearchProblem):
 
         return tuple(new_state)
 
+    """
+    Fast path for the solvers: yields (action, next_state, cost) for every action
+    available on ``state`` in a single pass.
+
+    Yields exactly the actions of ``actions(state)``, in the same order, with
+    ``succ(state, action)`` and ``cost(state, action)``, but without building the
+    action list, re-validating each action or calling cost() once per action.
+    """
+    def successors(self, state):
+        caps = self.capacities
+        fill, empty, pour, fill_l, empty_l, pour_l = self.cost_model.as_tuple()
+        for i in range(self.n):
+            si = state[i]
+
+            if si < caps[i]:
+                yield self._fill_actions[i], state[:i] + (caps[i],) + state[i + 1:], fill + fill_l * (caps[i] - si)
+
+            if si > 0:
+                yield self._empty_actions[i], state[:i] + (0,) + state[i + 1:], empty + empty_l * si
+
+                for j, action in self._pours[i]:
+                    room = caps[j] - state[j]
+                    if room > 0:
+                        amount = si if si < room else room
+                        new_state = list(state)
+                        new_state[i] = si - amount
+                        new_state[j] += amount
+                        yield action, tuple(new_state), pour + pour_l * amount
+
 
     # ---- Helpers ----
 
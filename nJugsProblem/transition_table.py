@@ -0,0 +1,430 @@
+# ============================================================
+# Dense transition table for small N-jugs instances
+#           + solvers (BFS, DFS, A*, goal sweeps) over integer state IDs
+# ============================================================
+
+import heapq
+import math
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from the3jugs import NJugsProblem
+from solvers import SearchBudget
+
+# Largest number of states (prod(capacity + 1)) we agree to compile by default.
+# Every case in test_cases.json is well below this.
+DEFAULT_MAX_STATES = 2_000_000
+
+
+"""
+Compiles the whole transition graph of an NJugsProblem (for its capacities)
+into integer arrays, once, so that repeated solves on the same capacities
+never call the Python ``actions`` / ``succ`` methods.
+
+State IDs are the mixed-radix encoding of the state (first jug most
+significant, like numpy's C order): id = sum(state[k] * stride[k]).
+Action IDs follow the order of NJugsProblem.actions():
+    fill(0), empty(0), pour(0, 1), ..., fill(1), empty(1), pour(1, 0), ...
+
+Attributes:
+    table=   int32 array (num_states x num_actions): next state ID, or -1
+             when the action is not available in that state
+    indptr, indices, edge_action=  the same graph in CSR form; the successors
+             of u are indices[indptr[u]:indptr[u+1]], in action order
+    actions= list of action tuples, indexed by action ID
+
+The table solvers count steps (unit cost); the CostModel of the problem is
+not compiled in. Use UniformCostSearch for weighted costs.
+"""
+class TransitionTable:
+    def __init__(self, capacities, max_states=DEFAULT_MAX_STATES):
+        caps = tuple(int(c) for c in capacities)
+        if any(c <= 0 for c in caps):
+            raise ValueError("All capacities must be positive integers.")
+
+        num_states = math.prod(c + 1 for c in caps)
+        if num_states > max_states:
+            raise ValueError(f"Too many states to compile ({num_states} > {max_states}).")
+
+        self.capacities = caps
+        self.n = len(caps)
+        self.num_states = num_states
+        self.shape = tuple(c + 1 for c in caps)
+        self.strides = tuple(math.prod(self.shape[k + 1:]) for k in range(self.n))
+
+        self.actions = []
+        for i in range(self.n):
+            self.actions.append(("fill", i, None))
+            self.actions.append(("empty", i, None))
+            for j in range(self.n):
+                if j != i:
+                    self.actions.append(("pour", i, j))
+        self.num_actions = len(self.actions)
+
+        self._build()
+        self._adjacency = None
+
+    def _build(self):
+        ids = np.arange(self.num_states, dtype=np.int64)
+        states = np.stack(np.unravel_index(ids, self.shape), axis=1)
+        caps = np.array(self.capacities, dtype=np.int64)
+        stride = np.array(self.strides, dtype=np.int64)
+
+        table = np.full((self.num_states, self.num_actions), -1, dtype=np.int32)
+        for a, (kind, i, j) in enumerate(self.actions):
+            si = states[:, i]
+            if kind == "fill":
+                valid = si < caps[i]
+                nxt = ids + (caps[i] - si) * stride[i]
+            elif kind == "empty":
+                valid = si > 0
+                nxt = ids - si * stride[i]
+            else:
+                amount = np.minimum(si, caps[j] - states[:, j])
+                valid = amount > 0
+                nxt = ids + amount * (stride[j] - stride[i])
+            table[valid, a] = nxt[valid]
+        self.table = table
+
+        # CSR form: row-major order of the valid entries keeps the action order.
+        valid = table >= 0
+        self.indptr = np.concatenate(([0], np.cumsum(valid.sum(axis=1)))).astype(np.int64)
+        self.indices = table[valid]
+        self.edge_action = np.nonzero(valid)[1].astype(np.int32)
+
+    # ---- Helpers ----
+
+    @classmethod
+    def from_problem(cls, problem: NJugsProblem, max_states=DEFAULT_MAX_STATES):
+        return compile_capacities(problem.capacities, max_states)
+
+    def encode(self, state):
+        return sum(int(s) * k for s, k in zip(state, self.strides))
+
+    def decode(self, state_id):
+        return tuple(int(x) for x in np.unravel_index(state_id, self.shape))
+
+    def start_id(self):
+        return 0
+
+    @property
+    def adjacency(self):
+        # Successor lists as plain Python lists (for the non-vectorized solvers).
+        if self._adjacency is None:
+            ind = self.indices.tolist()
+            ptr = self.indptr.tolist()
+            self._adjacency = [ind[ptr[u]:ptr[u + 1]] for u in range(self.num_states)]
+        return self._adjacency
+
+    def path_from_parents(self, parent, goal_id):
+        ids = [goal_id]
+        while parent[ids[-1]] >= 0:
+            ids.append(int(parent[ids[-1]]))
+        ids.reverse()
+        return [self.decode(u) for u in ids]
+
+
+"""
+Returns the (cached) TransitionTable for these capacities, so that every
+solver created for the same capacities shares one compiled table.
+"""
+@lru_cache(maxsize=16)
+def compile_capacities(capacities, max_states=DEFAULT_MAX_STATES):
+    return TransitionTable(tuple(int(c) for c in capacities), max_states)
+
+
+def _goal_id(table, goal):
+    goal = tuple(int(x) for x in goal)
+    if len(goal) != table.n:
+        raise ValueError("Goal length must match number of capacities (", table.n, ").")
+    if any(g < 0 or g > c for g, c in zip(goal, table.capacities)):
+        return -1  # outside the state space: unreachable
+    return table.encode(goal)
+
+
+"""
+Level-synchronous BFS over the dense table, fully vectorized with numpy
+(one table lookup per BFS level, not per state).
+
+Finds the same shortest cost and d as BFSSearch. Within a level, states keep
+their discovery order, so the parent of each state (and hence the returned
+path) is the one BFSSearch would pick.
+Counters are per level: "expanded" counts the states discovered up to the
+level of the goal.
+
+    TableBFSSearch(table, goal).solve()   -> same dictionary as BFSSearch
+    TableBFSSearch(table).distances()     -> depth of every state (-1 = unreachable)
+    TableBFSSearch(table).sweep(goals)    -> one result per goal, from a single BFS
+The budget (if any) is checked once per level.
+"""
+class TableBFSSearch:
+    def __init__(self, table: TransitionTable, goal=None, budget: SearchBudget = None):
+        self.table = table
+        self.goal = goal
+        self.budget = budget
+
+    def _run(self, goal_id=-1):
+        tbl = self.table.table
+        num_actions = self.table.num_actions
+
+        dist = np.full(self.table.num_states, -1, dtype=np.int32)
+        parent = np.full(self.table.num_states, -1, dtype=np.int32)
+        start = self.table.start_id()
+        dist[start] = 0
+        frontier = np.array([start], dtype=np.int64)
+
+        expanded = 0
+        generated = 0
+        depth = 0
+        self.complete = True
+        if self.budget is not None:
+            self.budget.start()
+
+        while frontier.size:
+            if goal_id >= 0 and dist[goal_id] == depth:
+                break
+            if self.budget is not None and self.budget.exhausted(expanded, force=True):
+                self.complete = False
+                break
+            expanded += frontier.size
+
+            succ = tbl[frontier].ravel()
+            src = np.repeat(frontier, num_actions)
+            keep = succ >= 0
+            generated += int(keep.sum())
+            succ, src = succ[keep], src[keep]
+
+            keep = dist[succ] < 0
+            succ, src = succ[keep], src[keep]
+            if not succ.size:
+                break
+
+            # First occurrence of each new state, in discovery order.
+            uniq, first = np.unique(succ, return_index=True)
+            order = np.argsort(first, kind="stable")
+            frontier = uniq[order].astype(np.int64)
+            parent[frontier] = src[first[order]]
+            depth += 1
+            dist[frontier] = depth
+
+        return dist, parent, expanded, generated, depth
+
+    def distances(self):
+        return self._run()[0]
+
+    def solve(self):
+        if self.goal is None:
+            raise ValueError("TableBFSSearch.solve() needs a goal (use distances() or sweep() without one).")
+        start_time = time.perf_counter()
+        goal_id = _goal_id(self.table, self.goal)
+        dist, parent, expanded, generated, depth = self._run(goal_id)
+        found = goal_id >= 0 and dist[goal_id] >= 0
+        elapsed = time.perf_counter() - start_time
+        return dict(
+            best_cost=int(dist[goal_id]) if found else math.inf,
+            best_path=self.table.path_from_parents(parent, goal_id) if found else [self.table.decode(0)],
+            found=bool(found),
+            expanded=int((dist >= 0).sum()),
+            b=(generated / expanded) if expanded else 0.0,
+            D=depth,
+            d=int(dist[goal_id]) if found else None,
+            time=elapsed,
+            complete=self.complete or bool(found),
+        )
+
+    def sweep(self, goals):
+        dist, parent, _, _, _ = self._run()
+        results = []
+        for goal in goals:
+            goal_id = _goal_id(self.table, goal)
+            found = goal_id >= 0 and dist[goal_id] >= 0
+            results.append(dict(
+                goal=tuple(int(x) for x in goal),
+                best_cost=int(dist[goal_id]) if found else math.inf,
+                best_path=self.table.path_from_parents(parent, goal_id) if found else [self.table.decode(0)],
+                found=bool(found),
+                d=int(dist[goal_id]) if found else None,
+                complete=self.complete or bool(found),
+            ))
+        return results
+
+
+"""
+Iterative DFS over integer state IDs. Same search order, counters and
+first-solution semantics as DFSSearch, but it uses the precompiled
+successor lists and a parent array instead of copying paths.
+As in DFSSearch, "expanded" counts the states discovered (pushed), not popped.
+"""
+class TableDFSSearch:
+    def __init__(self, table: TransitionTable, goal, budget: SearchBudget = None):
+        self.table = table
+        self.goal = goal
+        self.budget = budget
+
+    def solve(self):
+        start_time = time.perf_counter()
+        if self.budget is not None:
+            self.budget.start()
+        adjacency = self.table.adjacency
+        goal_id = _goal_id(self.table, self.goal)
+
+        start = self.table.start_id()
+        explored = bytearray(self.table.num_states)
+        explored[start] = 1
+        discovered = 1
+        parent = [-1] * self.table.num_states
+
+        # (state_id, depth)
+        stack = [(start, 0)]
+        expanded = 0
+        generated = 0
+        D = 0
+
+        complete = True
+
+        while stack:
+            if self.budget is not None and self.budget.exhausted(expanded):
+                complete = False
+                break
+
+            u, depth = stack.pop()
+            expanded += 1
+            D = max(D, depth)
+
+            if u == goal_id:
+                elapsed = time.perf_counter() - start_time
+                return dict(
+                    best_cost=depth,
+                    best_path=self.table.path_from_parents(parent, u),
+                    found=True,
+                    expanded=discovered,
+                    b=(generated / expanded) if expanded else 0.0,
+                    D=D,
+                    d=depth,
+                    time=elapsed,
+                    complete=True,
+                )
+
+            succ = adjacency[u]
+            generated += len(succ)
+            for v in reversed(succ):
+                if not explored[v]:
+                    explored[v] = 1
+                    discovered += 1
+                    parent[v] = u
+                    stack.append((v, depth + 1))
+
+        elapsed = time.perf_counter() - start_time
+        return dict(
+            best_cost=math.inf,
+            best_path=[self.table.decode(start)],
+            found=False,
+            expanded=discovered,
+            b=(generated / expanded) if expanded else 0.0,
+            D=D,
+            d=None,
+            time=elapsed,
+            complete=complete,
+        )
+
+
+"""
+Default A* heuristic: every action changes at most two jugs, so at least
+ceil(#jugs different from the goal / 2) more actions are needed.
+Admissible and consistent for unit costs. Returns one value per state ID
+(the array counterpart of solvers.mismatch_heuristic(problem, state)).
+"""
+def table_mismatch_heuristic(table: TransitionTable, goal):
+    states = np.stack(np.unravel_index(np.arange(table.num_states), table.shape), axis=1)
+    mismatches = (states != np.array(goal, dtype=np.int64)).sum(axis=1)
+    return ((mismatches + 1) // 2).astype(np.int32)
+
+
+"""
+A* over integer state IDs with a precomputed heuristic array
+(default: table_mismatch_heuristic). Optimal as long as the heuristic is consistent.
+
+returns the same keys as BFSSearch; "expanded" counts every state that was
+given a cost (popped or still in the open list), so it is not comparable
+with the BFS count.
+"""
+class TableAStarSearch:
+    def __init__(self, table: TransitionTable, goal, heuristic=None, budget: SearchBudget = None):
+        self.table = table
+        self.goal = goal
+        self.heuristic = heuristic
+        self.budget = budget
+
+    def solve(self):
+        start_time = time.perf_counter()
+        if self.budget is not None:
+            self.budget.start()
+        adjacency = self.table.adjacency
+        goal_id = _goal_id(self.table, self.goal)
+        start = self.table.start_id()
+
+        if goal_id < 0:
+            h = [0] * self.table.num_states
+        else:
+            h = (self.heuristic or table_mismatch_heuristic)(self.table, self.goal).tolist()
+
+        g = {start: 0}
+        parent = [-1] * self.table.num_states
+        closed = bytearray(self.table.num_states)
+        # (f, g, state_id)
+        heap = [(h[start], 0, start)]
+        expanded = 0
+        generated = 0
+        D = 0
+
+        complete = True
+
+        while heap:
+            if self.budget is not None and self.budget.exhausted(expanded):
+                complete = False
+                break
+
+            _, gu, u = heapq.heappop(heap)
+            if closed[u]:
+                continue
+            closed[u] = 1
+            expanded += 1
+            D = max(D, gu)
+
+            if u == goal_id:
+                elapsed = time.perf_counter() - start_time
+                return dict(
+                    best_cost=gu,
+                    best_path=self.table.path_from_parents(parent, u),
+                    found=True,
+                    expanded=len(g),
+                    b=(generated / expanded) if expanded else 0.0,
+                    D=D,
+                    d=gu,
+                    time=elapsed,
+                    complete=True,
+                )
+
+            succ = adjacency[u]
+            generated += len(succ)
+            gv = gu + 1
+            for v in succ:
+                if not closed[v] and gv < g.get(v, math.inf):
+                    g[v] = gv
+                    parent[v] = u
+                    heapq.heappush(heap, (gv + h[v], gv, v))
+
+        elapsed = time.perf_counter() - start_time
+        return dict(
+            best_cost=math.inf,
+            best_path=[self.table.decode(start)],
+            found=False,
+            expanded=len(g),
+            b=(generated / expanded) if expanded else 0.0,
+            D=D,
+            d=None,
+            time=elapsed,
+            complete=complete,
+        )